@@ -0,0 +1,27 @@
+"""Gunicorn config for the ShopGuard AI backend.
+
+preload_app imports app.py once in the master so workers fork with the code
+and caches already warm, but the model itself must load per worker: the
+inference batcher's consumer thread, TF's thread pools and any CUDA context
+do not survive os.fork(). GUNICORN_PRELOAD tells app.py to skip its
+import-time load; post_fork then runs init_inference() in each worker, where
+every request thread feeds that worker's own batcher. Bump WEB_CONCURRENCY
+only if the host has VRAM to hold one model copy per worker.
+"""
+import os
+
+# Must be set before preload imports app.py in the master
+os.environ['GUNICORN_PRELOAD'] = '1'
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+threads = int(os.environ.get('GUNICORN_THREADS', '32'))
+preload_app = True
+timeout = 300
+
+
+def post_fork(server, worker):
+    """Load the model and start the batcher inside the worker process"""
+    import app
+    app.init_inference()